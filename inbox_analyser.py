@@ -6,6 +6,7 @@
 # ============================================================
 
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import re
@@ -21,7 +22,11 @@ PRIMARY_RED = "#EE2536"
 
 def load_data(filepath: str) -> pd.DataFrame:
     """Load Excel file and validate required columns."""
-    df = pd.read_excel(filepath)
+    try:
+        df = pd.read_excel(filepath, engine="calamine")
+    except ImportError:
+        # python-calamine not installed
+        df = pd.read_excel(filepath, engine="openpyxl")
     required_cols = ['DateTimeSent', 'DateTimeReceived', 'Subject', 'Body.TextBody']
     missing_cols = [col for col in required_cols if col not in df.columns]
     if missing_cols:
@@ -33,10 +38,31 @@ def load_data(filepath: str) -> pd.DataFrame:
 # 2. CLEANING FUNCTIONS
 # =================================================================
 
+# Cleaning / filtering patterns, compiled once at import instead of per call
+WHITESPACE_RE = re.compile(r"\s+")
+PUNCT_RE = re.compile(r"[^\w\s]")
+CHATBOT_DROP_RE = re.compile(r"[^a-z0-9@._/%$ -]")
+
+# Auto-replies & spam subjects removed in preprocess
+EXCLUDE_TERMS = [
+    'respuesta automática', 'automatic reply', 'automatische antwort',
+    'réponse automatique', 'quarantine', 'undeliverable', 'test'
+]
+EXCLUDE_RE = re.compile("|".join(EXCLUDE_TERMS), re.IGNORECASE)
+
+
 def clean_datetime(series: pd.Series) -> pd.Series:
     """Convert to datetime, remove invalid years."""
-    series = pd.to_datetime(series, errors="coerce")
-    return series.mask((series.dt.year < 2000) | (series.dt.year > 2030))
+    # Typed Excel cells already arrive as datetime64; text goes through one ISO-8601 pass,
+    # and only the values it cannot read fall back to pandas' format inference
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        parsed = pd.to_datetime(series, format="ISO8601", errors="coerce")
+        retry = parsed.isna() & series.notna()
+        if retry.any():
+            parsed.loc[retry] = pd.to_datetime(series[retry], errors="coerce")
+        series = parsed
+    year = series.dt.year
+    return series.mask((year < 2000) | (year > 2030))
 
 
 def clean_text_basic(text: str) -> str:
@@ -44,8 +70,8 @@ def clean_text_basic(text: str) -> str:
     if pd.isna(text):
         return ""
     text = str(text).lower()
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"[^\w\s]", " ", text)
+    text = WHITESPACE_RE.sub(" ", text)
+    text = PUNCT_RE.sub(" ", text)
     return text.strip()
 
 
@@ -54,8 +80,8 @@ def clean_text_chatbot(text: str) -> str:
     if not isinstance(text, str):
         return ""
     text = text.lower()
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"[^a-z0-9@._/%$ -]", "", text)
+    text = WHITESPACE_RE.sub(" ", text)
+    text = CHATBOT_DROP_RE.sub("", text)
     return text.strip()
 
 
@@ -68,21 +94,14 @@ def preprocess(df: pd.DataFrame) -> pd.DataFrame:
     df["DateTimeSent"] = clean_datetime(df["DateTimeSent"])
     df["DateTimeReceived"] = clean_datetime(df["DateTimeReceived"])
 
-    # Remove rows with no valid dates
-    df = df.dropna(subset=["DateTimeSent", "DateTimeReceived"], how="all")
-
-    # Filter to 2025 only
+    # Filter to 2025 only, before any text work (NaT years compare False, so rows
+    # with no valid dates go here too)
     df = df[df["DateTimeReceived"].dt.year == 2025].copy()
     df.drop_duplicates(inplace=True)
     df.reset_index(drop=True, inplace=True)
 
     # Remove auto-replies & spam
-    exclude_terms = [
-        'respuesta automática', 'automatic reply', 'automatische antwort',
-        'réponse automatique', 'quarantine', 'undeliverable', 'test'
-    ]
-    pattern = re.compile("|".join(exclude_terms), re.IGNORECASE)
-    df = df[~df['Subject'].str.contains(pattern, na=False)].copy()
+    df = df[~df['Subject'].str.contains(EXCLUDE_RE, na=False)].copy()
 
     return df
 
@@ -173,6 +192,17 @@ COMPILED_MAP = {
 }
 
 
+# One alternation of all strong + weak patterns per subcategory: a single scan rules out
+# subcategories with no hits before the per-pattern counting below
+COMPILED_ANY = {
+    cat: {
+        sub: re.compile("|".join(f"(?:{p})" for p in strengths["strong"] + strengths["weak"]), re.IGNORECASE)
+        for sub, strengths in subcats.items()
+    }
+    for cat, subcats in CATEGORY_MAP.items()
+}
+
+
 def map_category(text: str) -> Tuple[str, str, str, float]:
     """Map text to category and compute confidence score."""
     text = clean_text_basic(text)
@@ -181,6 +211,8 @@ def map_category(text: str) -> Tuple[str, str, str, float]:
 
     for cat, subcats in COMPILED_MAP.items():
         for sub, strengths in subcats.items():
+            if not COMPILED_ANY[cat][sub].search(text):
+                continue
             strong_hits = sum(bool(p.search(text)) for p in strengths["strong"])
             weak_hits = sum(bool(p.search(text)) for p in strengths["weak"])
             score = strong_hits * 3 + weak_hits
@@ -195,10 +227,86 @@ def map_category(text: str) -> Tuple[str, str, str, float]:
     return cat, sub, label, min(1, best_score / 5)
 
 
+def match_mask(texts: pd.Series, pattern: re.Pattern) -> np.ndarray:
+    """Boolean array: whether the compiled pattern occurs in each (cleaned, non-null) text."""
+    return np.fromiter((pattern.search(t) is not None for t in texts), dtype=bool, count=len(texts))
+
+
+LEADING_LITERAL_RE = re.compile(r"\\b([a-z0-9&@ ]+)(.?)", re.IGNORECASE)
+# Under IGNORECASE these lowercase letters also match an ASCII one ("ı" ~ "i", "ſ" ~ "s")
+CASE_FOLD_CHARS = "[ıſ]"
+
+
+def required_literal(pattern: re.Pattern) -> str:
+    """Literal text every match must start with, e.g. "\\bhow to\\b" -> "how to" ("" if none)."""
+    if "|" in pattern.pattern:
+        # an alternation (top-level or grouped) can match without the leading literal
+        return ""
+    m = LEADING_LITERAL_RE.match(pattern.pattern)
+    if not m:
+        return ""
+    literal, following = m.groups()
+    if following and following in "?*{":
+        # the last character is optional
+        literal = literal[:-1]
+    return literal.lower() if pattern.flags & re.IGNORECASE else literal
+
+
+def pattern_mask(texts: pd.Series, pattern: re.Pattern, fold_rows: np.ndarray = None) -> np.ndarray:
+    """match_mask, with a plain substring scan (native on Arrow strings) ruling out rows first.
+
+    Texts are cleaned lowercase, so only rows containing the pattern's leading literal can
+    match; the regex then confirms just those candidates. fold_rows (texts containing
+    CASE_FOLD_CHARS) can be passed in to avoid recomputing it for every IGNORECASE pattern.
+    """
+    literal = required_literal(pattern)
+    if not literal:
+        return match_mask(texts, pattern)
+    candidates = texts.str.contains(literal, regex=False).to_numpy(dtype=bool)
+    if pattern.flags & re.IGNORECASE:
+        if fold_rows is None:
+            fold_rows = texts.str.contains(CASE_FOLD_CHARS).to_numpy(dtype=bool)
+        candidates = candidates | fold_rows
+    mask = np.zeros(len(texts), dtype=bool)
+    rows = np.flatnonzero(candidates)
+    mask[rows] = match_mask(texts.iloc[rows], pattern)
+    return mask
+
+
+# Flat (category, subcategory) order of COMPILED_MAP — the column order of the score matrix
+SUBCATEGORY_LABELS = [(cat, sub) for cat, subcats in COMPILED_MAP.items() for sub in subcats]
+
+
 def apply_category_mapping(df: pd.DataFrame) -> pd.DataFrame:
-    """Apply category mapping to dataframe."""
-    mapped = df["Body.TextBody"].apply(map_category)
-    df[["Category", "Sub-Category", "Sub-Sub-Category", "Confidence"]] = pd.DataFrame(mapped.tolist(), index=df.index)
+    """Apply category mapping to dataframe (vectorised equivalent of map_category per row)."""
+    # Score each distinct body once; rows pick their result up through the factorize codes
+    codes, bodies = pd.factorize(df["Body.TextBody"], use_na_sentinel=False)
+    text = pd.Series(bodies).map(clean_text_basic)
+    n = len(text)
+    fold_rows = text.str.contains(CASE_FOLD_CHARS).to_numpy(dtype=bool)
+
+    # rows x subcategories: score = 3 * strong hits + weak hits, one column-wide scan per pattern
+    scores = np.zeros((n, len(SUBCATEGORY_LABELS)), dtype=np.int64)
+    has_strong = np.zeros(scores.shape, dtype=bool)
+    for j, (cat, sub) in enumerate(SUBCATEGORY_LABELS):
+        strengths = COMPILED_MAP[cat][sub]
+        strong_hits = sum(pattern_mask(text, p, fold_rows).astype(np.int64) for p in strengths["strong"])
+        weak_hits = sum(pattern_mask(text, p, fold_rows).astype(np.int64) for p in strengths["weak"])
+        scores[:, j] = strong_hits * 3 + weak_hits
+        has_strong[:, j] = strong_hits > 0
+
+    # argmax keeps the first of tied subcategories, like the strict ">" in map_category
+    best = scores.argmax(axis=1)
+    rows = np.arange(n)
+    best_score = scores[rows, best]
+    found = best_score > 0
+    cats = np.array([cat for cat, _ in SUBCATEGORY_LABELS], dtype=object)
+    subs = np.array([sub for _, sub in SUBCATEGORY_LABELS], dtype=object)
+
+    df["Category"] = np.where(found, cats[best], "Not Detected")[codes]
+    df["Sub-Category"] = np.where(found, subs[best], "Not Detected")[codes]
+    df["Sub-Sub-Category"] = np.where(found, np.where(has_strong[rows, best], "strong", "weak"), "Not Detected")[codes]
+    df["Confidence"] = np.where(found, np.minimum(1, best_score / 5), 0.0)[codes]
     return df
 
 
@@ -278,10 +386,9 @@ def compute_score(subject: str, body: str) -> int:
     """Compute chatbot addressability score."""
     text = clean_text_chatbot(subject + " " + body)
     score = 0
-    for group, data in PATTERNS.items():
-        weight = data["weight"]
-        for pat in data["patterns"]:
-            if re.search(pat, text):
+    for weight, patterns in COMPILED_PATTERNS:
+        for pat in patterns:
+            if pat.search(text):
                 score += weight
     return score
 
@@ -297,10 +404,34 @@ def chatbot_addressability(row: pd.Series) -> Tuple[str, float, int]:
         return "No", 0.3, score
 
 
+# (weight, compiled patterns) per group
+COMPILED_PATTERNS = [
+    (data["weight"], [re.compile(p) for p in data["patterns"]])
+    for data in PATTERNS.values()
+]
+
+
 def apply_chatbot(df: pd.DataFrame) -> pd.DataFrame:
-    """Apply chatbot scoring to dataframe."""
-    results = df.apply(chatbot_addressability, axis=1)
-    df[["Chatbot_Addressable", "Chatbot_Confidence", "Chatbot_Score"]] = pd.DataFrame(results.tolist(), index=df.index)
+    """Apply chatbot scoring to dataframe (vectorised equivalent of chatbot_addressability per row)."""
+    # compute_score joins subject + " " + body, which raises TypeError on a missing or
+    # non-text value; keep that contract instead of scoring such rows as empty text
+    for col in ("Subject", "Body.TextBody"):
+        if df[col].isna().any() or pd.api.types.infer_dtype(df[col]) not in ("string", "empty"):
+            raise TypeError(f"{col} must contain only text values")
+    # Score each distinct subject + body once, then expand back to rows
+    codes, joined = pd.factorize(df["Subject"].astype(str) + " " + df["Body.TextBody"].astype(str))
+    text = pd.Series(joined).map(clean_text_chatbot)
+
+    # Each matching pattern adds its group's weight, as in compute_score
+    score = np.zeros(len(text), dtype=np.int64)
+    for weight, patterns in COMPILED_PATTERNS:
+        for pat in patterns:
+            score += weight * pattern_mask(text, pat)
+    score = score[codes]
+
+    df["Chatbot_Addressable"] = np.where(score >= 2, "Yes", "No")
+    df["Chatbot_Confidence"] = np.select([score >= 2, score <= -1], [np.minimum(1, score / 4), 0.1], 0.3)
+    df["Chatbot_Score"] = score
     return df
 
 
@@ -310,11 +441,14 @@ def apply_chatbot(df: pd.DataFrame) -> pd.DataFrame:
 
 def plot_monthly(df: pd.DataFrame):
     """Plot monthly email volume."""
-    monthly = df.groupby(df["DateTimeReceived"].dt.to_period("M")).size().reset_index(name="Count")
-    monthly["Month"] = monthly["DateTimeReceived"].astype(str)
+    # Counts per datetime64[M] value in one sort-based pass (no Period objects or groupby)
+    months, counts = np.unique(df["DateTimeReceived"].dropna().to_numpy().astype("datetime64[M]"), return_counts=True)
 
     fig, ax = plt.subplots(figsize=(10, 4))
-    sns.lineplot(data=monthly, x="Month", y="Count", marker='o', color=PRIMARY_RED, ax=ax)
+    # Plot the arrays directly; no long-form frame for seaborn to parse
+    ax.plot(months.astype(str), counts, marker='o', color=PRIMARY_RED)
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Count")
     ax.set_title("📈 Monthly Email Volume (2025)", fontsize=14)
     plt.xticks(rotation=45)
     plt.tight_layout()
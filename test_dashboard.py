@@ -0,0 +1,169 @@
+import ast
+import io
+import os
+import re
+import types
+from collections import Counter
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD = os.path.join(HERE, "ec-inbox-dashboard.py")
+WORKBOOK = os.path.join(HERE, "ECInbox_Analysis_20251202.xlsx")
+
+
+class _Streamlit(types.ModuleType):
+    """Just enough streamlit for the helper definitions: caching is a pass-through, the rest no-ops."""
+
+    def cache_data(self, func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def load_dashboard():
+    """The dashboard's imports, constants and helpers, without running the Streamlit script body."""
+    with open(DASHBOARD, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    keep = [
+        node for node in tree.body
+        if isinstance(node, ast.FunctionDef)
+        or (isinstance(node, (ast.Import, ast.ImportFrom)) and not any(a.name == "streamlit" for a in node.names))
+        or (isinstance(node, ast.Assign) and all(isinstance(t, ast.Name) and t.id.isupper() for t in node.targets))
+    ]
+    dash = types.ModuleType("dashboard")
+    dash.st, dash.engine = _Streamlit("streamlit"), None
+    exec(compile(ast.Module(body=keep, type_ignores=[]), DASHBOARD, "exec"), dash.__dict__)
+    return dash
+
+
+dash = load_dashboard()
+
+
+@pytest.fixture(scope="module")
+def workbook(tmp_path_factory):
+    """The default workbook as read, and as load_dataset hands it to the dashboard (sidecar kept out of the repo)."""
+    if not os.path.exists(WORKBOOK):
+        pytest.skip("default workbook not available")
+    cache = str(tmp_path_factory.mktemp("sidecar") / "workbook.parquet")
+    dash.parquet_cache_paths = lambda path: [cache]
+    return dash.safe_read_excel(WORKBOOK), dash.load_dataset(WORKBOOK, os.path.getmtime(WORKBOOK))
+
+
+def baseline_words(subjects):
+    """The original Text Insights tokenisation: one joined string, so phrases run across subjects."""
+    text = " ".join(subjects.dropna().tolist())
+    stopwords = {"the","and","to","of","in","for","on","at","a","is","with","by","an","be","or","please","hi","dear"}
+    return [w for w in re.findall(r'\b\w+\b', text.lower()) if w not in stopwords and len(w) > 2]
+
+
+def baseline_phrases(words, n):
+    grams = [" ".join(gram) for gram in zip(*(words[i:] for i in range(n)))]
+    return pd.DataFrame(Counter(grams).most_common(20), columns=["Phrase", "Frequency"])
+
+
+@pytest.mark.parametrize("categories", [(), ("Sanctions",)])
+def test_text_insights_match_baseline(workbook, categories):
+    raw, processed = workbook
+    start, end = processed["DateTimeReceived"].min().date(), processed["DateTimeReceived"].max().date()
+    mtime = os.path.getmtime(WORKBOOK)
+    filtered = dash.filter_dataset(WORKBOOK, mtime, categories, (), "All", start, end)
+    # Oracle: the workbook's own row order, filtered the way the original script did
+    expected = raw[raw["Category"].isin(categories)] if categories else raw
+    words = baseline_words(expected["Subject"])
+    # The exports hand back the filtered rows as they are, so they too stay in workbook order
+    assert filtered.index.is_monotonic_increasing
+
+    tokens = dash.load_tokens(WORKBOOK, mtime)
+    tokens = tokens[tokens.index.isin(filtered.index)]
+    assert tokens.tolist() == words
+    codes, vocab = pd.factorize(tokens.to_numpy())
+    for n in (2, 3):
+        pd.testing.assert_frame_equal(dash.top_phrases(codes, vocab, n), baseline_phrases(words, n), check_dtype=False)
+
+
+def read_xlsx(data):
+    return pd.read_excel(io.BytesIO(data), engine="openpyxl")
+
+
+def test_xlsx_export_round_trips_like_openpyxl():
+    # URL-like strings must come back verbatim: no hyperlinks, "mailto:" kept, long ones not dropped
+    df = pd.DataFrame({
+        "Subject": ["https://example.com/form", "mailto:ethics@example.com", "ftp://files/x", "http://x/" + "a" * 3000, "plain", None],
+        "Count": [1, 2, 3, 4, 5, 6],
+        "Score": [0.5, None, 1.25, 2.0, 3.0, 4.5],
+    })
+    expected = io.BytesIO()
+    df.to_excel(expected, index=False, engine="openpyxl")
+    pd.testing.assert_frame_equal(read_xlsx(dash.to_xlsx_bytes(df)), read_xlsx(expected.getvalue()))
+
+
+def test_xlsx_export_writes_date_column_without_time():
+    received = pd.to_datetime(["2025-01-02 10:11:12", "2025-03-04 08:00:00"])
+    df = dash.derive_time_parts(pd.DataFrame({"DateTimeReceived": received}))
+    df["Date"] = df["Date"].where(df.index == 0)  # a missing date stays an empty cell
+    # What the original export wrote: datetime.date objects through openpyxl
+    expected = io.BytesIO()
+    df.assign(Date=df["Date"].dt.date).to_excel(expected, index=False, engine="openpyxl")
+    data = dash.to_xlsx_bytes(df)
+    pd.testing.assert_frame_equal(read_xlsx(data), read_xlsx(expected.getvalue()))
+    sheet = openpyxl.load_workbook(io.BytesIO(data)).active
+    formats = {cell.number_format.lower() for cell in next(sheet.iter_cols(min_col=2, max_col=2, min_row=2)) if cell.value is not None}
+    assert sheet.cell(1, 2).value == "Date" and formats == {"yyyy-mm-dd"}
+
+
+@pytest.mark.parametrize("values, expected", [
+    (["2025-01-01T10:00:00+08:00", "2025-01-02 10:00"], ["2025-01-01 10:00", "2025-01-02 10:00"]),
+    (["2025-01-02 10:00", "2025-01-01T10:00:00+08:00"], ["2025-01-02 10:00", "2025-01-01 10:00"]),
+    (["2025-01-01T10:00:00+08:00", "2025-01-02T10:00:00+00:00", "not a date", None], ["2025-01-01 10:00", "2025-01-02 10:00", None, None]),
+])
+def test_parse_datetime_keeps_wall_clock_for_mixed_offsets(values, expected):
+    parsed = dash.parse_datetime(pd.Series(values, dtype=object))
+    assert parsed.dtype.kind == "M" and parsed.dt.tz is None
+    assert parsed.tolist() == pd.to_datetime(pd.Series(expected)).tolist()
+    # ...and the whole load path gets through, keeping every parseable row
+    df = dash.fallback_process(pd.DataFrame({"DateTimeReceived": values, "Subject": "s", "Body.TextBody": "b"}))
+    assert df["Date"].tolist() == pd.to_datetime(pd.Series(expected)).dropna().dt.normalize().tolist()
+
+
+def test_auto_summary_matches_baseline(workbook):
+    raw, processed = workbook
+    start, end = processed["DateTimeReceived"].min().date(), processed["DateTimeReceived"].max().date()
+    summary = dash.agg_bundle(WORKBOOK, os.path.getmtime(WORKBOOK), (), (), "All", start, end)["auto_summary"]
+    # The original table: plain-string groupby over the chatbot rows, then sorted by Count
+    chatbot_df = processed[processed["Chatbot_Addressable"] == "Yes"].astype({"Category": str, "Sub-Category": str})
+    expected = chatbot_df.groupby(["Category", "Sub-Category"]).size().reset_index(name="Count").sort_values("Count", ascending=False)
+    pd.testing.assert_frame_equal(summary.astype({"Category": str, "Sub-Category": str}), expected, check_dtype=False)
+
+
+def counter_phrases(words, n, k=20):
+    """Counter.most_common over joined n-grams — the implementation top_phrases replaced."""
+    grams = [" ".join(gram) for gram in zip(*(words[i:] for i in range(n)))]
+    return pd.DataFrame(Counter(grams).most_common(k), columns=["Phrase", "Frequency"])
+
+
+def token_streams(count=400, seed=0):
+    """Random token streams over small vocabularies (many ties), including empty and short ones."""
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        vocab = [f"w{i}" for i in range(rng.integers(1, 30))]
+        yield [vocab[i] for i in rng.integers(0, len(vocab), rng.integers(0, 300))]
+
+
+@pytest.mark.parametrize("n", [2, 3])
+def test_top_phrases_matches_counter(n):
+    for words in token_streams():
+        codes, vocab = pd.factorize(np.array(words, dtype=object))
+        pd.testing.assert_frame_equal(dash.top_phrases(codes, vocab, n), counter_phrases(words, n), check_dtype=False)
+
+
+def test_top_phrases_falls_back_when_keys_would_overflow():
+    # 2.2M distinct words: width ** 3 no longer fits an int64 key, so phrases are counted as tuples
+    vocab = np.arange(2_200_000).astype(str).astype(object)
+    rng = np.random.default_rng(1)
+    codes = len(vocab) - 1 - rng.integers(0, 6, 2000)
+    pd.testing.assert_frame_equal(dash.top_phrases(codes, vocab, 3), counter_phrases(vocab[codes].tolist(), 3), check_dtype=False)